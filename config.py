@@ -1,15 +1,11 @@
 import logging
+import os
 import pathlib
+import pickle
 from dataclasses import dataclass, field
 
-# tomllib on 3.11+, fallback to tomli if needed
-try:
-    import tomllib as tomli
-except ModuleNotFoundError:
-    import tomli
-
 # region Configuration Loading
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AudioConfig:
     device: str | int | None = None
     sample_rate: int = 16000
@@ -17,28 +13,39 @@ class AudioConfig:
     ring_buffer_duration_s: float = 3.0
     pre_roll_s: float = 0.7
     post_roll_s: float = 0.3
+    # PortAudio input buffering; must cover the longest stall in the read loop
+    input_latency_s: float = 0.5
+    cpu_affinity: list[int] | None = None  # pin the capture thread (Linux only)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ModelConfig:
     # Model & runtime
     path: str = "models/faster-whisper-medium.en-int8/"
-    compute_type: str = "int8_float32"
+    # None picks int8_float16 on CUDA and int8 on CPU (see WhisperPTT._resolve_compute_type)
+    compute_type: str | None = None
     device: str = "cuda"
 
     # Decoding/search
     beam_size: int = 5
+    # Typed dictation decodes greedily (beam_size=1, best_of=1, temperature 0);
+    # beam_size above then only applies to voice notes
+    greedy_typing: bool = True
     repetition_penalty: float = 1.2
     log_prob_threshold: float | None = -1.0
-    temperature: float | list[float] | None = None
+    # A single temperature disables faster-whisper's fallback ladder
+    # (0.0, 0.2, ... 1.0), which re-decodes noisy audio up to six times.
+    temperature: float | list[float] | None = 0.0
     patience: float | None = None
     length_penalty: float | None = None
     best_of: int | None = None
+    batch_size: int | None = None  # batched VAD-chunk decoding (faster-whisper >= 1.1)
+    gpu_features: bool = False  # log-mel on the GPU via torch (device = "cuda" only)
 
     # Accuracy/filters
     compression_ratio_threshold: float | None = None
     no_speech_threshold: float | None = None
-    condition_on_previous_text: bool | None = None
+    condition_on_previous_text: bool | None = False
     initial_prompt: str | None = None
     word_timestamps: bool | None = None
     language: str | None = None  # app defaults to "en" if not set
@@ -51,6 +58,7 @@ class ModelConfig:
     # CPU/loader hints (applied if provided & supported)
     cpu_threads: int | None = None
     num_workers: int | None = None
+    cpu_affinity: list[int] | None = None  # pin CTranslate2's compute threads (Linux only)
 
     # Env caps (applied before importing numpy/BLAS)
     omp_num_threads: int | None = None
@@ -58,24 +66,54 @@ class ModelConfig:
     openblas_num_threads: int | None = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class UIConfig:
     hotkeys: list[str] = field(default_factory=lambda: ["ctrl_r", "shift_r"])
     hotkey_voicenote: list[str] = field(default_factory=lambda: ["ctrl_r", "alt_r"])
     voicenote_file: str = "~/ObsidianVault1/🎙️VoiceNotes.md"
     enable_audio_cues: bool = True
+    paste_via_clipboard: bool = False  # paste with Ctrl+V instead of typing (replaces clipboard)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AppConfig:
     audio: AudioConfig = field(default_factory=AudioConfig)
     model: ModelConfig = field(default_factory=ModelConfig)
     ui: UIConfig = field(default_factory=UIConfig)
 
 
+def _read_config_cache(cache_path: pathlib.Path, key: tuple) -> dict | None:
+    """Return the cached TOML data if it was parsed from a file matching `key`."""
+    try:
+        with open(cache_path, "rb") as f:
+            cached_key, toml_data = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.debug(f"Ignoring unreadable config cache '{cache_path}': {e}")
+        return None
+    return toml_data if cached_key == key else None
+
+
+def _write_config_cache(cache_path: pathlib.Path, key: tuple, toml_data: dict):
+    try:
+        with open(cache_path, "wb") as f:
+            pickle.dump((key, toml_data), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        logging.debug(f"Could not write config cache '{cache_path}': {e}")
+
+
 def load_or_create_config(path: str = "config.toml") -> AppConfig:
     config_path = pathlib.Path(path)
-    if not config_path.exists():
+    # The parsed TOML is cached next to the config, keyed by mtime+size, so
+    # normal launches skip the TOML parser entirely.
+    cache_path = config_path.with_name(config_path.name + ".cache")
+    # Open once and stat the open fd instead of probing with exists() first
+    try:
+        f = open(config_path, "rb")
+    except FileNotFoundError:
+        f = None
+    if f is None:
         logging.info(f"Config file not found. Creating a default '{path}'.")
         default_config_str = f"""
 [audio]
@@ -88,7 +126,7 @@ post_roll_s = 0.20
 
 [model]
 path = "models/faster-whisper-small.en-int8/"
-compute_type = "int8"
+# compute_type = "int8"  # default: int8_float16 on cuda, int8 on cpu
 device = "cpu"
 
 # latency/quality
@@ -123,14 +161,29 @@ hotkey_voicenote = ["ctrl_r", "alt_r"]
 voicenote_file = "~/ObsidianVault1/🎙️VoiceNotes.md"
 enable_audio_cues = true
 """
-        config_path.write_text(default_config_str.strip())
-
-    with open(config_path, "rb") as f:
-        toml_data = tomli.load(f)
-
-    app_conf = AppConfig()
-    app_conf.audio = AudioConfig(**toml_data.get("audio", {}))
-    app_conf.model = ModelConfig(**toml_data.get("model", {}))
-    app_conf.ui = UIConfig(**toml_data.get("ui", {}))
-    return app_conf
+        # "x+b" creates exclusively and keeps the fd open for the read below
+        f = open(config_path, "x+b")
+        f.write(default_config_str.strip().encode("utf-8"))
+        f.flush()
+        f.seek(0)
+
+    with f:
+        st = os.fstat(f.fileno())
+        key = (st.st_mtime_ns, st.st_size)
+        toml_data = _read_config_cache(cache_path, key)
+        if toml_data is None:
+            # Only a cache miss pays for importing the TOML parser
+            # stdlib tomllib on 3.11+, fallback to the tomli backport if needed
+            try:
+                import tomllib
+            except ModuleNotFoundError:
+                import tomli as tomllib
+            toml_data = tomllib.load(f)
+            _write_config_cache(cache_path, key, toml_data)
+
+    return AppConfig(
+        audio=AudioConfig(**toml_data.get("audio", {})),
+        model=ModelConfig(**toml_data.get("model", {})),
+        ui=UIConfig(**toml_data.get("ui", {})),
+    )
 # endregion
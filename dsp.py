@@ -0,0 +1,19 @@
+import numpy as np
+
+
+def sine_into(out: np.ndarray, freq: float, sample_rate: int, amplitude: float) -> np.ndarray:
+    """Writes `amplitude * sin(2*pi*freq*n/sample_rate)` into the float32 `out` in place.
+
+    Every step is a float32 ufunc over the one buffer (no float64 temporaries),
+    so NumPy runs it as a handful of vectorized C loops.
+    """
+    out[:] = np.arange(len(out), dtype=np.float32)
+    out *= np.float32(2 * np.pi * freq / sample_rate)
+    np.sin(out, out=out)
+    out *= np.float32(amplitude)
+    return out
+
+
+def sine(freq: float, samples: int, sample_rate: int, amplitude: float) -> np.ndarray:
+    """Returns a new float32 sine tone of `samples` samples."""
+    return sine_into(np.empty(samples, dtype=np.float32), freq, sample_rate, amplitude)
@@ -0,0 +1,107 @@
+import inspect
+
+import numpy as np
+from faster_whisper.feature_extractor import FeatureExtractor
+
+# faster-whisper 1.0.x defaults to True (pad by n_samples); 1.1+ to a sample count
+# (160). Callers rely on the default, so mirror whichever version is installed.
+_DEFAULT_PADDING = inspect.signature(FeatureExtractor.__call__).parameters["padding"].default
+
+
+class FastFeatureExtractor(FeatureExtractor):
+    """Drop-in FeatureExtractor with a vectorized STFT.
+
+    faster-whisper 1.0.x frames the waveform and runs one FFT per 10 ms hop in a
+    Python loop (~3000 iterations for the 30 s of padding alone). This builds
+    the same reflect-padded frames as a strided view and runs a single batched
+    rfft over them. The Hann window is computed once at construction; the mel
+    filterbank is already cached by the base class.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.window = np.hanning(self.n_fft + 1)[:-1]
+
+    @staticmethod
+    def is_needed() -> bool:
+        """True if the installed FeatureExtractor still uses the per-frame loop."""
+        return hasattr(FeatureExtractor, "fram_wave")
+
+    def __call__(self, waveform, padding=True, chunk_length=None):
+        if chunk_length is not None:
+            self.n_samples = chunk_length * self.sampling_rate
+            self.nb_max_frames = self.n_samples // self.hop_length
+
+        if padding:
+            waveform = np.pad(waveform, [(0, self.n_samples)])
+
+        # Centered frames, reflect-padded at both ends (same as fram_wave)
+        half_window = (self.n_fft - 1) // 2 + 1
+        padded = np.pad(waveform, half_window, mode="reflect")
+        frames = np.lib.stride_tricks.sliding_window_view(padded, self.n_fft)[::self.hop_length]
+
+        stft = np.fft.rfft(frames * self.window, axis=-1)
+        magnitudes = np.square(np.abs(stft[:-1].T), dtype=np.float32)
+
+        mel_spec = self.mel_filters @ magnitudes
+
+        log_spec = np.log10(np.clip(mel_spec, a_min=1e-10, a_max=None))
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        log_spec = (log_spec + 4.0) / 4.0
+
+        return log_spec
+
+
+class TorchFeatureExtractor(FeatureExtractor):
+    """Drop-in FeatureExtractor that computes the log-mel spectrogram on the GPU.
+
+    Runs the same periodic-Hann, reflect-centered STFT and mel projection as the
+    CPU path with torch.stft on CUDA; only the final float32 features are copied
+    back for CTranslate2. torch is imported on construction, so this module
+    stays importable without it.
+    """
+
+    def __init__(self, device: str = "cuda", **kwargs):
+        super().__init__(**kwargs)
+        import torch
+        self._torch = torch
+        self.device = torch.device(device)
+        self._window = torch.hann_window(self.n_fft, periodic=True, device=self.device)
+        self._mel_filters = torch.from_numpy(np.asarray(self.mel_filters, dtype=np.float32)).to(self.device)
+
+    @staticmethod
+    def is_available() -> bool:
+        """True if torch is installed and can see a CUDA device."""
+        try:
+            import torch
+        except ImportError:
+            return False
+        return torch.cuda.is_available()
+
+    def __call__(self, waveform, padding=_DEFAULT_PADDING, chunk_length=None):
+        torch = self._torch
+        if chunk_length is not None:
+            self.n_samples = chunk_length * self.sampling_rate
+            self.nb_max_frames = self.n_samples // self.hop_length
+
+        if _DEFAULT_PADDING is True:  # 1.0.x: any truthy padding means "pad by n_samples"
+            pad = self.n_samples if padding else 0
+        else:  # 1.1+: padding is a sample count
+            pad = int(padding or 0)
+
+        with torch.inference_mode():
+            audio = torch.from_numpy(np.ascontiguousarray(waveform, dtype=np.float32)).to(self.device)
+            if pad:
+                audio = torch.nn.functional.pad(audio, (0, pad))
+
+            stft = torch.stft(audio, self.n_fft, self.hop_length, window=self._window,
+                              center=True, pad_mode="reflect", return_complex=True)
+            magnitudes = stft[..., :-1].abs() ** 2
+
+            mel_spec = self._mel_filters @ magnitudes
+
+            log_spec = torch.clamp(mel_spec, min=1e-10).log10()
+            log_spec = torch.maximum(log_spec, log_spec.amax(dim=(-2, -1), keepdim=True) - 8.0)
+            log_spec = (log_spec + 4.0) / 4.0
+
+            return log_spec.cpu().numpy()
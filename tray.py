@@ -1,11 +1,28 @@
 import logging
 import subprocess
+import types
 import urllib.parse
 
 import gi
 gi.require_version('Gtk', '3.0')
+gi.require_version('Gdk', '3.0')
 gi.require_version('Notify', '0.7')
-from gi.repository import Gtk, GdkPixbuf, Notify
+from gi.repository import Gtk, Gdk, GdkPixbuf, Notify
+
+ICON_MAP = types.MappingProxyType({
+    "idle": "icon-idle.png",
+    "recording": "icon-rec.png",
+    "processing": "icon-proc.png",
+    "error": "icon-error.png",
+})
+TOOLTIP_MAP = types.MappingProxyType({
+    "idle": "Whisper PTT (Idle)",
+    "recording": "Whisper PTT (Recording...)",
+    "processing": "Whisper PTT (Processing...)",
+    "error": "Whisper PTT (Error: Audio device unavailable)",
+})
+_DEFAULT_STATE = "idle"
+_DEFAULT_TOOLTIP = "Whisper PTT"
 
 class TrayIconGTK:
     """Manages the GTK System Tray Icon and notifications."""
@@ -18,28 +35,39 @@ class TrayIconGTK:
         Notify.init("Whisper PTT")
         self.notification = Notify.Notification.new("", "", "")
         self.notification.add_action("default", "Open File", self.on_notification_click)
+        self._pixbufs = self._load_icons()
+        self._obsidian_uri = self._build_obsidian_uri(self.app.voicenote_file_path)
         self.set_state("idle") # Set initial icon
 
+    @staticmethod
+    def _build_obsidian_uri(note_path) -> str:
+        """Builds the Obsidian URI for the voice note file (static for the process)."""
+        # The vault is the note's parent directory; Obsidian wants the file
+        # name without its extension (.stem). Both are URL-encoded.
+        encoded_vault = urllib.parse.quote(note_path.parent.name)
+        encoded_file = urllib.parse.quote(note_path.stem)
+        return f"obsidian://open?vault={encoded_vault}&file={encoded_file}"
+
+    def _load_icons(self) -> dict:
+        """Decodes every state icon once; set_state then just swaps pixbufs."""
+        pixbufs = {}
+        for state, icon_name in ICON_MAP.items():
+            icon_path = self.base_dir / icon_name
+            try:
+                # GdkPixbuf is the native way to load images for GTK icons.
+                # This correctly handles RGBA transparency.
+                pixbufs[state] = GdkPixbuf.Pixbuf.new_from_file(str(icon_path))
+            except gi.repository.GLib.Error as e:
+                logging.warning(f"Could not load icon '{icon_path}': {e.message}.")
+        return pixbufs
+
     def on_notification_click(self, notification, action):
         """Callback for when the notification is clicked."""
         logging.info("Notification clicked, opening voice note in Obsidian.")
         try:
-            # Deconstruct the path to get the vault and file name
-            note_path = self.app.voicenote_file_path
-            vault_name = note_path.parent.name
-
-            # URL-encode the components for the Obsidian URI
-            encoded_vault = urllib.parse.quote(vault_name)
-            # Obsidian URI uses the filename without the extension (.stem)
-            encoded_file = urllib.parse.quote(note_path.stem)
-
-            # Construct the Obsidian URI
-            obsidian_uri = f"obsidian://open?vault={encoded_vault}&file={encoded_file}"
-
-            logging.info(f"Constructed Obsidian URI: {obsidian_uri}")
-
-            # Use xdg-open to launch the URI
-            subprocess.run(["xdg-open", obsidian_uri], check=True)
+            logging.info(f"Opening Obsidian URI: {self._obsidian_uri}")
+            # Use xdg-open to launch the URI; don't block the GTK loop waiting on it
+            subprocess.Popen(["xdg-open", self._obsidian_uri])
         except FileNotFoundError:
             logging.error("`xdg-open` command not found. Cannot open Obsidian URI.")
         except Exception as e:
@@ -51,31 +79,21 @@ class TrayIconGTK:
         self.notification.set_timeout(5000) # 5 seconds
         self.notification.show()
 
+    def set_clipboard_text(self, text: str):
+        """Puts text on the CLIPBOARD selection (must be called on the GTK thread)."""
+        clipboard = Gtk.Clipboard.get(Gdk.SELECTION_CLIPBOARD)
+        clipboard.set_text(text, -1)
+
     def set_state(self, state: str):
         """Updates the icon and tooltip based on the application state."""
-        icon_map = {
-            "idle": "icon-idle.png",
-            "recording": "icon-rec.png",
-            "processing": "icon-proc.png",
-            "error": "icon-error.png",
-        }
-        tooltip_map = {
-            "idle": "Whisper PTT (Idle)",
-            "recording": "Whisper PTT (Recording...)",
-            "processing": "Whisper PTT (Processing...)",
-            "error": "Whisper PTT (Error: Audio device unavailable)",
-        }
-        icon_name = icon_map.get(state, "icon-idle.png")
-        icon_path = self.base_dir / icon_name
-        try:
-            # GdkPixbuf is the native way to load images for GTK icons.
-            # This correctly handles RGBA transparency.
-            pixbuf = GdkPixbuf.Pixbuf.new_from_file(str(icon_path))
-            self.icon.set_property("pixbuf", pixbuf)
-            self.icon.set_property("tooltip-text", tooltip_map.get(state, "Whisper PTT"))
-            self.icon.set_property("visible", True)
-        except gi.repository.GLib.Error as e:
-            logging.warning(f"Could not load icon '{icon_path}': {e.message}. Tray icon not updated.")
+        pixbuf = self._pixbufs.get(state) or self._pixbufs.get(_DEFAULT_STATE)
+        if pixbuf is None:
+            logging.warning(f"No icon loaded for state '{state}'. Tray icon not updated.")
+            return
+        # Typed setters skip the GObject property-name lookup of set_property()
+        self.icon.set_from_pixbuf(pixbuf)
+        self.icon.set_tooltip_text(TOOLTIP_MAP.get(state, _DEFAULT_TOOLTIP))
+        self.icon.set_visible(True)
 
     def on_right_click(self, icon, button, time):
         menu = Gtk.Menu()
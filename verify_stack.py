@@ -8,6 +8,8 @@ import ctranslate2
 import sys
 import os
 
+from dsp import sine_into
+
 # --- Configuration (match it to your main script) ---
 MODEL_PATH = "models/faster-whisper-small.en-int8/"
 COMPUTE_TYPE = "int8_float32"
@@ -56,14 +58,12 @@ def run_verification():
         # Create a dummy 5-second audio clip of silence with a beep
         sample_rate = 16000
         duration = 5
-        t = np.linspace(0., 1., int(sample_rate * 1.0))
         amplitude = np.iinfo(np.int16).max * 0.2
-        # A simple 440Hz sine wave (note 'A')
-        beep = (amplitude * np.sin(2. * np.pi * 440. * t)).astype(np.float32)
-        
-        # Create a silent audio array and place the beep in the middle
+
+        # Create a silent audio array and write a 1-second 440Hz sine (note 'A')
+        # straight into its second second, in float32, without a separate buffer
         dummy_audio = np.zeros(sample_rate * duration, dtype=np.float32)
-        dummy_audio[sample_rate:sample_rate+len(beep)] = beep
+        sine_into(dummy_audio[sample_rate:2 * sample_rate], 440., sample_rate, amplitude)
         
         print("Transcribing a dummy 5-second audio clip...")
         segments, _ = model.transcribe(dummy_audio, beam_size=5, language="en")
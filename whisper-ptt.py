@@ -2,38 +2,77 @@
 from __future__ import annotations
 
 # Import only stdlib first; we'll read config and set env caps
-import collections
+import concurrent.futures
+import contextlib
 import datetime
 import logging
 import os
 import pathlib
+import shutil
 import signal
 import sys
+import tempfile
 import threading
 import time
 import inspect
 
-# Load config early (no NumPy/BLAS imports yet)
+# Config loading is stdlib-only (no NumPy/BLAS imports yet)
 from config import AppConfig, load_or_create_config
 
 BASE_DIR = pathlib.Path(__file__).parent.resolve()
-CONFIG: AppConfig = load_or_create_config()
-
-# Apply env caps from config (won't override if already set in the OS)
-if getattr(CONFIG.model, "omp_num_threads", None) is not None:
-    os.environ.setdefault("OMP_NUM_THREADS", str(CONFIG.model.omp_num_threads))
-if getattr(CONFIG.model, "mkl_num_threads", None) is not None:
-    os.environ.setdefault("MKL_NUM_THREADS", str(CONFIG.model.mkl_num_threads))
-if getattr(CONFIG.model, "openblas_num_threads", None) is not None:
-    os.environ.setdefault("OPENBLAS_NUM_THREADS", str(CONFIG.model.openblas_num_threads))
-
-# Now safe to import external libs that respect those env vars
-import numpy as np
-import sounddevice as sd
-from faster_whisper import WhisperModel
-from pynput import keyboard
-from gi.repository import GLib
-from tray import TrayIconGTK
+CONFIG: AppConfig | None = None  # loaded in main(), before any heavy import
+
+# Heavy runtime modules (NumPy/BLAS, PortAudio, CTranslate2, pynput, GTK) are
+# bound lazily by _import_runtime(), after main() has applied the env caps and
+# only on paths that need them (not e.g. --list-devices).
+np = None
+sd = None
+WhisperModel = None
+BatchedInferencePipeline = None
+VadOptions = get_speech_timestamps = None
+FastFeatureExtractor = TorchFeatureExtractor = None
+keyboard = None
+GLib = None
+TrayIconGTK = None
+dsp = None
+_HOTKEY_TABLE: dict = {}  # pynput special-key name -> keyboard.Key, filled on import
+
+
+def _import_runtime():
+    """Import the heavy runtime dependencies into module globals (once)."""
+    global np, sd, WhisperModel, BatchedInferencePipeline, keyboard, GLib, TrayIconGTK, dsp, _HOTKEY_TABLE
+    global VadOptions, get_speech_timestamps, FastFeatureExtractor, TorchFeatureExtractor
+    if np is not None:
+        return
+    import numpy as np
+    import sounddevice as sd
+    from faster_whisper import WhisperModel
+    try:
+        from faster_whisper import BatchedInferencePipeline
+    except ImportError:  # faster-whisper < 1.1
+        BatchedInferencePipeline = None
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+    from features import FastFeatureExtractor, TorchFeatureExtractor
+    from pynput import keyboard
+    from gi.repository import GLib
+    from tray import TrayIconGTK
+    import dsp
+    _HOTKEY_TABLE = dict(keyboard.Key.__members__)
+
+
+# States in which the audio callback appends blocks to the utterance buffer
+RECORDING_STATES = frozenset({"recording", "recording_voicenote"})
+
+
+def _apply_env_caps(config: AppConfig):
+    """Export BLAS/OpenMP thread caps; must run before NumPy/CT2 are imported."""
+    # Won't override values already set in the OS environment
+    if getattr(config.model, "omp_num_threads", None) is not None:
+        os.environ.setdefault("OMP_NUM_THREADS", str(config.model.omp_num_threads))
+    if getattr(config.model, "mkl_num_threads", None) is not None:
+        os.environ.setdefault("MKL_NUM_THREADS", str(config.model.mkl_num_threads))
+    if getattr(config.model, "openblas_num_threads", None) is not None:
+        os.environ.setdefault("OPENBLAS_NUM_THREADS", str(config.model.openblas_num_threads))
 
 
 def _filter_kwargs(func, kwargs: dict) -> dict:
@@ -42,41 +81,95 @@ def _filter_kwargs(func, kwargs: dict) -> dict:
     return {k: v for k, v in kwargs.items() if k in params}
 
 
+def _pin_current_thread(cpus: list[int] | None, label: str) -> set[int] | None:
+    """Restrict the calling thread to `cpus`, if configured; returns the mask it replaced."""
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return None
+    try:
+        previous = os.sched_getaffinity(0)
+        os.sched_setaffinity(0, set(cpus))
+        logging.info("Pinned %s thread to CPUs %s.", label, sorted(set(cpus)))
+        return previous
+    except OSError as e:
+        logging.warning(f"Could not pin {label} thread to CPUs {cpus}: {e}")
+        return None
+
+
+@contextlib.contextmanager
+def _pinned(cpus: list[int] | None, label: str):
+    """Pin the calling thread for the duration of the block, then restore its mask.
+
+    Threads created inside the block inherit the mask; that is how it reaches
+    CTranslate2's worker threads, which are spawned when the model is built.
+    """
+    previous = _pin_current_thread(cpus, label)
+    try:
+        yield
+    finally:
+        if previous is not None:
+            os.sched_setaffinity(0, previous)
+
+
 class WhisperPTT:
     """The main application class."""
     def __init__(self, config: AppConfig, base_dir: pathlib.Path):
+        _import_runtime()
         global CONFIG
         CONFIG = config
         self.base_dir = base_dir
         self.state = "idle"  # idle, recording, recording_voicenote, processing, error
+        self._state_dirty = False  # a tray refresh is already queued on the GTK loop
         self.shutdown_event = threading.Event()
         self.audio_device_ok = threading.Event()
         self._lock = threading.Lock()
         self.voicenote_file_path = pathlib.Path(os.path.expanduser(CONFIG.ui.voicenote_file))
+        self._ensure_voicenote_dir()
 
         self.audio_thread = None
+        self._model_reload: concurrent.futures.Future | None = None  # pending reconnect reload
         self.keyboard_listener = None
+        # One long-lived worker owns all transcription (jobs are serialized anyway)
+        self._transcriber = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcriber")
 
         self.block_size = int(CONFIG.audio.sample_rate * CONFIG.audio.block_duration_ms / 1000)
         ring_buffer_frames = int(CONFIG.audio.ring_buffer_duration_s * CONFIG.audio.sample_rate)
         self.ring_buffer_blocks = ring_buffer_frames // self.block_size + 1
-        self.pre_roll_blocks = int(CONFIG.audio.pre_roll_s * CONFIG.audio.sample_rate) // self.block_size
+        # Leave the row being written out of reach of the pre-roll copy
+        self.pre_roll_frames = min(int(CONFIG.audio.pre_roll_s * CONFIG.audio.sample_rate),
+                                   (self.ring_buffer_blocks - 1) * self.block_size)
         self.post_roll_frames = int(CONFIG.audio.post_roll_s * CONFIG.audio.sample_rate)
 
-        self.ring_buffer = collections.deque(maxlen=self.ring_buffer_blocks)
-        self.capture_buffer: list[np.ndarray] = []
+        # Pre-roll ring: one contiguous (blocks, block_size) array with a write
+        # cursor. Zero-initialised so an early press just gets silence.
+        self._ring = np.zeros((self.ring_buffer_blocks, self.block_size), dtype=np.float32)
+        self._ring_cursor = 0
+        self._ring_flat = self._ring.reshape(-1)  # 1-D view for sample-exact pre-roll
+        # Captured audio is written straight into one contiguous buffer (grown
+        # on demand) and handed to the transcriber as a view.
+        self._utterance_capacity = self.ring_buffer_blocks * self.block_size + self.post_roll_frames
+        self._utterance = np.empty(self._utterance_capacity, dtype=np.float32)
+        self._utterance_len = 0
 
         # Dependencies
         self.tray = TrayIconGTK(self, self.base_dir)
+        self.batched_pipeline = None
         self.model = self._load_model()
         self.keyboard_controller = keyboard.Controller()
         self.hotkeys = self._parse_hotkeys(CONFIG.ui.hotkeys)
         self.hotkeys_voicenote = self._parse_hotkeys(CONFIG.ui.hotkey_voicenote)
-        self.pressed_keys = set()
+        # Each hotkey gets one bit, so combo tests on every global key event are
+        # int AND/compare instead of set hashing. Other keys map to 0.
+        self._key_bits = {key: 1 << i for i, key in enumerate(self.hotkeys | self.hotkeys_voicenote)}
+        self._hotkeys_mask = self._key_mask(self.hotkeys)
+        self._hotkeys_voicenote_mask = self._key_mask(self.hotkeys_voicenote)
+        self._pressed_mask = 0
         self.typing_in_progress = threading.Event()
         self.pending_text: str | None = None
         self.beep_start = self._create_beep(freq=440, duration_ms=50)
         self.beep_stop = self._create_beep(freq=880, duration_ms=50)
+        self._beep_stream = self._open_beep_stream()
+        # stream.write() blocks until the cue is buffered; keep that off the hotkey thread
+        self._cue_player = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="cues")
 
         logging.info("Env caps in effect: OMP_NUM_THREADS=%s, MKL_NUM_THREADS=%s, OPENBLAS_NUM_THREADS=%s",
                      os.getenv("OMP_NUM_THREADS"), os.getenv("MKL_NUM_THREADS"), os.getenv("OPENBLAS_NUM_THREADS"))
@@ -88,6 +181,7 @@ class WhisperPTT:
             logging.info("Releasing existing Whisper model...")
             del self.model
             self.model = None
+            self.batched_pipeline = None
             import gc
             gc.collect()
             time.sleep(1)
@@ -101,7 +195,7 @@ class WhisperPTT:
         try:
             model_kwargs = dict(
                 device=CONFIG.model.device,
-                compute_type=CONFIG.model.compute_type,
+                compute_type=self._resolve_compute_type(),
                 cpu_threads=getattr(CONFIG.model, "cpu_threads", None),
                 num_workers=getattr(CONFIG.model, "num_workers", None),
             )
@@ -109,8 +203,21 @@ class WhisperPTT:
             model_kwargs = {k: v if v is not None else None for k, v in model_kwargs.items() if v is not None}
             model_kwargs = _filter_kwargs(WhisperModel.__init__, model_kwargs)
 
-            model = WhisperModel(str(model_path), **model_kwargs)
+            # CT2 spawns its compute threads here; they keep the mask they start with
+            with _pinned(CONFIG.model.cpu_affinity, "model loader"):
+                model = WhisperModel(str(model_path), **model_kwargs)
             logging.info("Model '%s' loaded with kwargs=%s.", model_path.name, model_kwargs)
+            if CONFIG.model.gpu_features and CONFIG.model.device == "cuda" and TorchFeatureExtractor.is_available():
+                model.feature_extractor = TorchFeatureExtractor(**model.feat_kwargs)
+                logging.info("Computing log-mel features on the GPU.")
+            else:
+                if CONFIG.model.gpu_features:
+                    logging.warning("model.gpu_features needs device = \"cuda\" and a CUDA-enabled torch. "
+                                    "Computing features on the CPU.")
+                if FastFeatureExtractor.is_needed():
+                    model.feature_extractor = FastFeatureExtractor(**model.feat_kwargs)
+            self._warm_up(model)
+            self.batched_pipeline = self._create_batched_pipeline(model)
             return model
         except Exception as e:
             logging.fatal(f"Failed to load Whisper model: {e}")
@@ -118,27 +225,151 @@ class WhisperPTT:
             GLib.idle_add(self.tray.show_notification, "Whisper PTT Fatal Error", "Failed to load model. See logs.")
             return None
 
+    @staticmethod
+    def _resolve_compute_type() -> str:
+        """Picks the int8 variant for the device unless the config overrides it.
+
+        int8 weights halve the bytes the encoder streams per matmul and map onto
+        VNNI / INT8 Tensor Core dot products. The cost is a small, usually
+        inaudible WER shift versus float16/float32.
+        """
+        device = CONFIG.model.device
+        compute_type = CONFIG.model.compute_type
+        if compute_type is None:
+            compute_type = "int8_float16" if device == "cuda" else "int8"
+            try:
+                import ctranslate2
+                supported = ctranslate2.get_supported_compute_types(device)
+            except Exception:
+                supported = None
+            if supported is not None and compute_type not in supported:
+                # e.g. pre-Turing GPUs without int8 + fp16 kernels
+                logging.warning("compute_type '%s' is not supported on %s; using 'default'.",
+                                compute_type, device)
+                compute_type = "default"
+        logging.info("Using compute_type '%s' on %s.", compute_type, device)
+        return compute_type
+
+    def _warm_up(self, model: WhisperModel):
+        """Runs one dummy decode so the first real PTT doesn't pay for cold start.
+
+        The first transcribe() creates the CUDA context, cuBLAS/cuDNN handles and
+        CT2 workspace buffers; doing that here moves the lag to startup.
+        """
+        start = time.perf_counter()
+        try:
+            silence = np.zeros(CONFIG.audio.sample_rate, dtype=np.float32)
+            segments, _ = model.transcribe(silence, language=(CONFIG.model.language or "en"),
+                                           beam_size=CONFIG.model.beam_size, vad_filter=False)
+            for _ in segments:
+                pass
+        except Exception as e:
+            logging.warning(f"Model warm-up failed: {e}")
+            return
+        logging.info("Model warmed up in %.0f ms.", (time.perf_counter() - start) * 1000)
+
+    def _create_batched_pipeline(self, model: WhisperModel):
+        """Wraps the model for batched VAD-chunk decoding, if enabled."""
+        if not CONFIG.model.batch_size:
+            return None
+        if BatchedInferencePipeline is None:
+            logging.warning("model.batch_size is set but this faster-whisper has no "
+                            "BatchedInferencePipeline (needs >= 1.1). Decoding sequentially.")
+            return None
+        logging.info("Transcriptions will be decoded in batches of %d.", CONFIG.model.batch_size)
+        return BatchedInferencePipeline(model=model)
+
+    def _key_mask(self, keys: set) -> int:
+        mask = 0
+        for key in keys:
+            mask |= self._key_bits[key]
+        return mask
+
     def _parse_hotkeys(self, key_strs: list[str]) -> set:
         keys = set()
         for key_str in key_strs:
             key_str = key_str.lower()
-            if hasattr(keyboard.Key, key_str):
-                keys.add(getattr(keyboard.Key, key_str))
+            key = _HOTKEY_TABLE.get(key_str)
+            if key is not None:
+                keys.add(key)
             elif len(key_str) == 1:
                 keys.add(keyboard.KeyCode.from_char(key_str))
             else:
                 logging.warning(f"Invalid hotkey '{key_str}' in config. Ignoring.")
         return keys
 
+    def _append_capture(self, block: np.ndarray):
+        start = self._utterance_len
+        end = start + len(block)
+        # Always keep room for the post-roll so release never has to grow
+        if end + self.post_roll_frames > len(self._utterance):
+            grown = np.empty(max(end + self.post_roll_frames, 2 * len(self._utterance)), dtype=np.float32)
+            grown[:start] = self._utterance[:start]
+            self._utterance = grown
+        self._utterance[start:end] = block
+        self._utterance_len = end
+
+    def _shrink_capture(self):
+        """Drops a buffer grown by a long hold back to the base size.
+
+        The base buffer is reused across presses; only a grown one is replaced,
+        so a long dictation doesn't keep its peak RSS for the rest of the session.
+        """
+        if len(self._utterance) > self._utterance_capacity:
+            self._utterance = np.empty(self._utterance_capacity, dtype=np.float32)
+
+    def _copy_pre_roll(self):
+        """Start the utterance with the last `pre_roll_frames` samples of the ring."""
+        n = self.pre_roll_frames
+        end = self._ring_cursor * self.block_size
+        wrapped = max(0, n - end)  # samples that come from the end of the ring
+        if wrapped:
+            np.copyto(self._utterance[:wrapped], self._ring_flat[-wrapped:])
+        np.copyto(self._utterance[wrapped:n], self._ring_flat[end - (n - wrapped):end])
+        self._utterance_len = n
+
     def _create_beep(self, freq: int, duration_ms: int) -> np.ndarray:
         samples = int(duration_ms / 1000 * CONFIG.audio.sample_rate)
-        t = np.linspace(0, duration_ms / 1000, samples, False)
-        return 0.2 * np.sin(freq * 2 * np.pi * t).astype(np.float32)
+        return dsp.sine(freq, samples, CONFIG.audio.sample_rate, amplitude=0.2)
     # endregion
 
+    def _open_beep_stream(self):
+        """Opens one persistent output stream for the cues (PortAudio open is not cheap)."""
+        if not CONFIG.ui.enable_audio_cues:
+            return None
+        try:
+            stream = sd.OutputStream(samplerate=CONFIG.audio.sample_rate, channels=1, dtype="float32")
+            stream.start()
+            return stream
+        except sd.PortAudioError as e:
+            logging.warning(f"Could not open audio output for cues: {e}")
+            return None
+
     def _play_sound(self, sound_array: np.ndarray):
         if CONFIG.ui.enable_audio_cues:
-            threading.Thread(target=sd.play, args=(sound_array, CONFIG.audio.sample_rate), daemon=True).start()
+            self._cue_player.submit(self._write_cue, sound_array)
+
+    def _write_cue(self, sound_array: np.ndarray):
+        # The cue thread owns the stream. A write that fails (e.g. the device
+        # went away) drops it and reopens once, so cues come back after a reconnect.
+        for _ in range(2):
+            if self._beep_stream is None:
+                self._beep_stream = self._open_beep_stream()
+                if self._beep_stream is None:
+                    return
+            try:
+                self._beep_stream.write(sound_array)
+                return
+            except sd.PortAudioError as e:
+                logging.warning(f"Could not play audio cue: {e}")
+                self._close_beep_stream()
+
+    def _close_beep_stream(self):
+        try:
+            self._beep_stream.close()
+        except sd.PortAudioError:
+            pass
+        self._beep_stream = None
 
     def _type_text(self, text: str):
         """Type text safely from the GTK main loop, with modifiers released first."""
@@ -168,7 +399,13 @@ class WhisperPTT:
             # tiny pause to let OS observe the releases
             time.sleep(0.03)
 
-            self.keyboard_controller.type(text)
+            if CONFIG.ui.paste_via_clipboard:
+                # One synthesized Ctrl+V instead of an XTest event per character
+                self.tray.set_clipboard_text(text)
+                with self.keyboard_controller.pressed(keyboard.Key.ctrl):
+                    self.keyboard_controller.tap("v")
+            else:
+                self.keyboard_controller.type(text)
         except Exception:
             logging.exception("Typing failed")
         finally:
@@ -180,8 +417,19 @@ class WhisperPTT:
         if self.state == new_state:
             return
         self.state = new_state
-        logging.info(f"State changed to: {self.state}")
-        GLib.idle_add(self.tray.set_state, self.state)
+        logging.info("State changed to: %s", self.state)
+        # Coalesce: one queued refresh shows whatever state is current when it runs
+        if not self._state_dirty:
+            self._state_dirty = True
+            GLib.idle_add(self._flush_state_to_tray)
+
+    def _flush_state_to_tray(self):
+        # Clear the flag before reading the state so a change that lands while
+        # we run queues a fresh refresh instead of being dropped
+        self._state_dirty = False
+        self.tray.set_state(self.state)
+        # returning False removes this idle callback
+        return False
 
     def _process_transcription(self, audio_data: np.ndarray, to_file: bool = False):
         try:
@@ -213,10 +461,32 @@ class WhisperPTT:
             # (word_timestamps can be False explicitly — keep it if set False in config)
             if CONFIG.model.word_timestamps is False:
                 transcribe_kwargs["word_timestamps"] = False
-            transcribe_kwargs = _filter_kwargs(self.model.transcribe, transcribe_kwargs)
-
-            segments, _ = self.model.transcribe(audio_data, **transcribe_kwargs)
-            full_text = " ".join(s.text.strip() for s in segments).strip()
+            if not to_file and CONFIG.model.greedy_typing:
+                # Dictation is latency-bound and short; beam search buys it
+                # next to nothing over greedy for several times the decoder passes
+                transcribe_kwargs.update(beam_size=1, best_of=1, temperature=0.0)
+            transcribe = self.model.transcribe
+            if self.batched_pipeline is not None:
+                # Decode the VAD chunks of the recording as one batch. The
+                # pipeline needs its own VAD pass to split the batch, and skips
+                # the model entirely when that pass finds no speech.
+                transcribe = self.batched_pipeline.transcribe
+                transcribe_kwargs["batch_size"] = CONFIG.model.batch_size
+            else:
+                # Run the VAD ourselves so a press with no speech never reaches
+                # the model (faster-whisper would still build 30 s of log-mel)
+                speech_chunks = get_speech_timestamps(audio_data, VadOptions(**vad_params))
+                if not speech_chunks:
+                    logging.info("No speech detected. Skipping transcription.")
+                    return
+                audio_data = np.concatenate([audio_data[c["start"]:c["end"]] for c in speech_chunks])
+                transcribe_kwargs["vad_filter"] = False
+                del transcribe_kwargs["vad_parameters"]
+            transcribe_kwargs = _filter_kwargs(transcribe, transcribe_kwargs)
+
+            segments, _ = transcribe(audio_data, **transcribe_kwargs)
+            _strip = str.strip
+            full_text = _strip(" ".join([_strip(s.text) for s in segments]))
             if full_text:
                 logging.info(f"-> Transcribed: '{full_text}'")
                 if to_file:
@@ -228,37 +498,80 @@ class WhisperPTT:
         except Exception as e:
             logging.error(f"Transcription failed: {e}")
         finally:
-            self._update_state("idle")
+            # Only this job's return to idle lets a new capture start: the state
+            # is "processing", or "error" after a device loss, and a reconnect
+            # reload queues behind this job. So nothing else touches the buffer.
+            with self._lock:
+                self._shrink_capture()
+                if self.state == "processing":
+                    self._update_state("idle")
 
     # region Event Handlers & Workers
-    def _audio_callback(self, indata, frames, time_info, status):
-        if status:
-            logging.warning(f"PortAudio status: {status}")
-        audio_chunk = indata.flatten().astype(np.float32) / 32768.0
-        self.ring_buffer.append(audio_chunk)
-        if self.state in ["recording", "recording_voicenote"]:
-            self.capture_buffer.append(audio_chunk)
+    def _consume_block(self, indata, frames: int):
+        """Moves one block read from the input stream into the ring (and capture)."""
+        audio_chunk = self._ring[self._ring_cursor]
+        # indata is a raw CFFI buffer of float32 samples (PortAudio converts in
+        # C); view it without copying and copy it straight into the ring row
+        np.copyto(audio_chunk, np.frombuffer(indata, dtype=np.float32, count=frames))
+        # Publishing the row and deciding whether to append it must be one step
+        # against the hotkey thread: a press in between would take the row into
+        # the pre-roll and then see it appended a second time.
+        with self._lock:
+            self._ring_cursor = (self._ring_cursor + 1) % self.ring_buffer_blocks
+            if self.state in RECORDING_STATES:
+                self._append_capture(audio_chunk)
+
+    def _ensure_voicenote_dir(self, directory: pathlib.Path | None = None):
+        try:
+            (directory or self.voicenote_file_path.parent).mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logging.error(f"Could not create voice note directory: {e}")
 
     def _write_to_voicenote_file(self, text: str):
         try:
-            self.voicenote_file_path.parent.mkdir(parents=True, exist_ok=True)
-            existing_content = ""
-            if self.voicenote_file_path.exists():
-                with open(self.voicenote_file_path, "r", encoding="utf-8") as f:
-                    existing_content = f.read()
             timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             new_note = f"__{timestamp}__\n{text}\n\n"
-            with open(self.voicenote_file_path, "w", encoding="utf-8") as f:
-                f.write(new_note)
-                f.write(existing_content)
-            logging.info(f"Prepended to {self.voicenote_file_path}")
-            GLib.idle_add(self.tray.show_notification, f"Note Saved to {self.voicenote_file_path.name}", text)
+            # Follow a symlinked note (e.g. into a synced vault) so the swap below
+            # replaces the real file instead of the link
+            path = self.voicenote_file_path.resolve()
+            # Newest note first: stream the old notes behind the new one into a
+            # sibling temp file, then swap it in atomically. The old content is
+            # copied in chunks rather than read into memory as one string.
+            try:
+                src = open(path, "rb")
+            except FileNotFoundError:
+                try:
+                    f = open(path, "x", encoding="utf-8")
+                except FileNotFoundError:
+                    # The directory is created at startup; recreate it if it was removed since
+                    self._ensure_voicenote_dir(path.parent)
+                    f = open(path, "x", encoding="utf-8")
+                with f:
+                    f.write(new_note)
+            else:
+                with src:
+                    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+                    try:
+                        with os.fdopen(fd, "wb") as dst:
+                            dst.write(new_note.encode("utf-8"))
+                            shutil.copyfileobj(src, dst, length=64 * 1024)
+                            # Data must be on disk before the rename, or a power loss can
+                            # leave an empty file where the note history was
+                            dst.flush()
+                            os.fsync(dst.fileno())
+                        shutil.copymode(path, tmp_name)
+                        os.replace(tmp_name, path)
+                    except BaseException:
+                        os.unlink(tmp_name)
+                        raise
+            logging.info(f"Prepended to {path}")
+            GLib.idle_add(self.tray.show_notification, f"Note Saved to {path.name}", text)
         except Exception as e:
             logging.error(f"Failed to write to voice note file: {e}")
 
     def _maybe_flush_pending_text(self):
         # Only type when no keys from the typing combo are physically held
-        if not (self.pressed_keys & self.hotkeys) and self.pending_text:
+        if not (self._pressed_mask & self._hotkeys_mask) and self.pending_text:
             GLib.idle_add(self._type_text, self.pending_text)
             self.pending_text = None
             return False  # stop repeating
@@ -269,79 +582,97 @@ class WhisperPTT:
     def _on_press(self, key):
         if self.typing_in_progress.is_set():
             return
-        if isinstance(key, (keyboard.Key, keyboard.KeyCode)):
-            self.pressed_keys.add(key)
+        self._pressed_mask |= self._key_bits.get(key, 0)
+        pressed = self._pressed_mask
         with self._lock:
             if self.state != "idle" or not self.audio_device_ok.is_set():
                 return
-            if self.hotkeys.issubset(self.pressed_keys):
+            if (pressed & self._hotkeys_mask) == self._hotkeys_mask:
                 self._update_state("recording")
                 self._play_sound(self.beep_start)
-                self.capture_buffer.clear()
-                self.capture_buffer.extend(list(self.ring_buffer)[-self.pre_roll_blocks:])
-            elif self.hotkeys_voicenote.issubset(self.pressed_keys):
+                self._copy_pre_roll()
+            elif (pressed & self._hotkeys_voicenote_mask) == self._hotkeys_voicenote_mask:
                 self._update_state("recording_voicenote")
                 self._play_sound(self.beep_start)
-                self.capture_buffer.clear()
-                self.capture_buffer.extend(list(self.ring_buffer)[-self.pre_roll_blocks:])
+                self._copy_pre_roll()
 
     def _on_release(self, key):
         # ignore synthetic events while we're injecting
         if self.typing_in_progress.is_set():
             return
 
-        if isinstance(key, (keyboard.Key, keyboard.KeyCode)):
-            if key in self.pressed_keys:
-                self.pressed_keys.remove(key)
+        bit = self._key_bits.get(key, 0)
+        self._pressed_mask &= ~bit
 
         trigger = None
         with self._lock:
-            if self.state == "recording" and key in self.hotkeys:
+            if self.state == "recording" and bit & self._hotkeys_mask:
                 trigger = "type"                 # fire on first key-up
                 self._update_state("processing")
-            elif self.state == "recording_voicenote" and key in self.hotkeys_voicenote:
+            elif self.state == "recording_voicenote" and bit & self._hotkeys_voicenote_mask:
                 trigger = "voicenote"            # fire on first key-up
                 self._update_state("processing")
 
         if trigger:
             self._play_sound(self.beep_stop)
-            post_roll_silence = np.zeros(self.post_roll_frames, dtype=np.float32)
-            final_audio_data = np.concatenate(self.capture_buffer + [post_roll_silence])
+            end = self._utterance_len + self.post_roll_frames
+            self._utterance[self._utterance_len:end].fill(0.0)
+            final_audio_data = self._utterance[:end]
             is_voicenote = (trigger == "voicenote")
-            threading.Thread(
-                target=self._process_transcription,
-                args=(final_audio_data, is_voicenote),
-                daemon=True
-            ).start()
+            self._transcriber.submit(self._process_transcription, final_audio_data, is_voicenote)
+
+    def _reload_model(self):
+        """Reloads the model after an audio device reconnect (runs on the transcriber)."""
+        self.model = self._load_model()
+        with self._lock:
+            self._model_reload = None
+            # The device loss left us in "error"; don't clobber anything newer
+            if self.state == "error":
+                self._update_state("idle" if self.model else "error")
+            self.audio_device_ok.set()
+        if self.model:
+            GLib.idle_add(self.tray.show_notification, "Whisper PTT", "Audio device connected.")
 
     def _audio_worker(self):
         logging.info("Audio worker started.")
+        # This thread does all Python-side audio work, so it is the one to pin
+        _pin_current_thread(CONFIG.audio.cpu_affinity, "audio")
         while not self.shutdown_event.is_set():
             try:
-                with sd.InputStream(
+                # Blocking mode: no Python runs in PortAudio's realtime thread. A
+                # GIL/GC stall here still overflows once it outlasts the host input
+                # buffer, so size that explicitly instead of using the default
+                # 'high' latency (tens of ms). Doesn't affect pre-roll alignment.
+                with sd.RawInputStream(
                     samplerate=CONFIG.audio.sample_rate,
                     channels=1,
-                    dtype="int16",
+                    dtype="float32",
                     blocksize=self.block_size,
-                    callback=self._audio_callback,
                     device=CONFIG.audio.device,
-                ):
-                    if not self.audio_device_ok.is_set():
+                    latency=CONFIG.audio.input_latency_s,
+                ) as stream:
+                    if not self.audio_device_ok.is_set() and self._model_reload is None:
                         logging.info("Audio device reconnected. Re-initializing model...")
-                        self.model = self._load_model()
-                        if self.model:
-                            GLib.idle_add(self.tray.show_notification, "Whisper PTT", "Audio device connected.")
-                            self._update_state("idle")
-                        else:
-                            self._update_state("error")
-                    self.audio_device_ok.set()
-                    self.shutdown_event.wait()
+                        # Reload on the transcriber (behind any job still in flight) so this
+                        # thread keeps draining the stream; it sets audio_device_ok when done.
+                        with self._lock:  # a fast reload can't clear the handle before it's stored
+                            self._model_reload = self._transcriber.submit(self._reload_model)
+                    while not self.shutdown_event.is_set():
+                        data, overflowed = stream.read(self.block_size)
+                        if overflowed:
+                            logging.warning("PortAudio input overflow; audio was dropped.")
+                        self._consume_block(data, self.block_size)
             except sd.PortAudioError as e:
-                if self.audio_device_ok.is_set():
+                # Under the lock, and cleared first, so neither a press nor a
+                # finishing job can slip back to idle/recording on a dead device
+                with self._lock:
+                    was_ok = self.audio_device_ok.is_set()
+                    self.audio_device_ok.clear()
+                    if was_ok:
+                        self._update_state("error")
+                if was_ok:
                     logging.error(f"Audio device error: {e}")
-                    self._update_state("error")
                     GLib.idle_add(self.tray.show_notification, "Whisper PTT Error", "Audio device disconnected. Retrying...")
-                self.audio_device_ok.clear()
                 time.sleep(5)
             except Exception as e:
                 logging.fatal(f"An unhandled exception occurred in the audio worker: {e}")
@@ -351,6 +682,10 @@ class WhisperPTT:
     # endregion
 
     def run(self):
+        # Start the transcriber's worker thread now, from this unpinned thread: a
+        # new thread copies its creator's CPU mask, and the first submit could
+        # otherwise be the reconnect reload from the pinned audio thread
+        self._transcriber.submit(lambda: None).result()
         self.audio_device_ok.set()
         self.audio_thread = threading.Thread(target=self._audio_worker, daemon=True)
         self.audio_thread.start()
@@ -371,17 +706,25 @@ class WhisperPTT:
                 self.audio_thread.join()
             if self.keyboard_listener:
                 self.keyboard_listener.stop()
+            self._transcriber.shutdown(wait=False, cancel_futures=True)
+            self._cue_player.shutdown(wait=True, cancel_futures=True)
+            if self._beep_stream is not None:
+                self._close_beep_stream()
             self.tray.stop()
 
 
 def main():
     logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    config = load_or_create_config()
+    _apply_env_caps(config)
+
     if "--list-devices" in sys.argv:
+        import sounddevice as sd
         print("Available audio devices:")
         print(sd.query_devices())
         sys.exit(0)
 
-    app = WhisperPTT(CONFIG, BASE_DIR)
+    app = WhisperPTT(config, BASE_DIR)
     signal.signal(signal.SIGINT, lambda s, f: app.stop())
     app.run()
 